@@ -112,6 +112,10 @@ class MapWindowBase(object):
      - Cell2Pixel (if it is possible)
     """
 
+    # available cursors, shared by all map windows
+    # (created with the first window since wx.App has to exist)
+    _cursors = None
+
     def __init__(self, parent, giface, Map):
         self.parent = parent
         self.Map = Map
@@ -162,13 +166,14 @@ class MapWindowBase(object):
         }
 
         # available cursors
-        self._cursors = {
-            "default": StockCursor(cursorId=wx.CURSOR_ARROW),
-            "cross": StockCursor(cursorId=wx.CURSOR_CROSS),
-            "hand": StockCursor(cursorId=wx.CURSOR_HAND),
-            "pencil": StockCursor(cursorId=wx.CURSOR_PENCIL),
-            "sizenwse": StockCursor(cursorId=wx.CURSOR_SIZENWSE)
-        }
+        if MapWindowBase._cursors is None:
+            MapWindowBase._cursors = {
+                "default": StockCursor(cursorId=wx.CURSOR_ARROW),
+                "cross": StockCursor(cursorId=wx.CURSOR_CROSS),
+                "hand": StockCursor(cursorId=wx.CURSOR_HAND),
+                "pencil": StockCursor(cursorId=wx.CURSOR_PENCIL),
+                "sizenwse": StockCursor(cursorId=wx.CURSOR_SIZENWSE)
+            }
 
         # default cursor for window is arrow (at least we rely on it here)
         # but we need to define attribute here
@@ -25,7 +25,7 @@ import time
 import copy
 import math
 
-from threading import Thread
+from threading import Thread, Event
 
 import wx
 from wx.lib.newevent import NewEvent
@@ -52,6 +52,36 @@ wxUpdateLight, EVT_UPDATE_LIGHT = NewEvent()
 wxUpdateCPlane, EVT_UPDATE_CPLANE = NewEvent()
 
 
+def _cloneSettings(value):
+    """Copy nested settings (dictionaries and lists)
+
+    Faster replacement of copy.deepcopy() for settings; leaves (numbers,
+    strings, tuples) are immutable and shared.
+    """
+    if isinstance(value, dict):
+        return dict((k, _cloneSettings(v)) for k, v in six.iteritems(value))
+    if isinstance(value, list):
+        return [_cloneSettings(v) for v in value]
+    return value
+
+
+# fringe directions (edges of surface)
+FRINGE_DIRECTIONS = ('nw', 'ne', 'sw', 'se')
+
+
+def _popUpdate(prop):
+    """Remove update mark from property
+
+    :param prop: property dictionary (marked by 'update' key)
+
+    :return: True if property was marked for update
+    """
+    if 'update' in prop:
+        del prop['update']
+        return True
+    return False
+
+
 class NvizThread(Thread):
 
     def __init__(self, log, progressbar, window):
@@ -62,11 +92,16 @@ class NvizThread(Thread):
         self.window = window
 
         self._display = None
+        # set when display instance is created
+        self.ready = Event()
 
         self.setDaemon(True)
 
     def run(self):
-        self._display = wxnviz.Nviz(self.log, self.progressbar)
+        try:
+            self._display = wxnviz.Nviz(self.log, self.progressbar)
+        finally:
+            self.ready.set()
 
     def GetDisplay(self):
         """Get display instance"""
@@ -139,9 +174,31 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         self.mouse = {
             'use': 'pointer'
         }
+        # delayed switch from quick to full rendering (mouse wheel)
+        self._quickTimer = None
+        # True when last full quality rendering took long (progress bar
+        # is shown only in that case)
+        self._slowDraw = False
+        # data layer properties waiting for update (see
+        # UpdateMapObjProperties()), merged per data dictionary
+        self._pendingUpdates = {}
 
         # list of loaded map layers (layer tree items)
         self.layers = list()
+        # names of loaded map layers by type (see GetLayerNames)
+        self._layerNamesCache = {}
+        # object ids of loaded map layers (see GetLayerId)
+        self._layerIdCache = {}
+        # enabled map layers in layer tree (see _getEnabledLayers)
+        self._enabledLayers = None
+        # functions loading/unloading map layers of given type, called
+        # with layer item and its layer info
+        self._loaders = {'raster': self._loadRaster,
+                         'raster_3d': self._loadRaster,
+                         'vector': self._loadVectorLayer}
+        self._unloaders = {'raster': self._unloadRaster,
+                           'raster_3d': self._unloadRaster,
+                           'vector': self._unloadVectorLayer}
         # list of constant surfaces
         self.constants = list()
         # id of base surface (when vector is loaded and no surface exist)
@@ -164,6 +221,12 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         self.hitradius = 5
         # layer manager toolwindow
         self.toolWin = None
+        # surface choice in vector page of toolwindow (see
+        # _getSurfaceChoiceWin)
+        self._surfaceChoiceWin = None
+        # toolwindow widgets read by NvizCmdCommand (see
+        # _getCmdToolWindows)
+        self._cmdToolWindows = None
 
         if self.lmgr:
             self.log = self.lmgr._gconsole
@@ -181,26 +244,25 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                                      self.parent.GetProgressBar(),
                                      logmsg)
         self.nvizThread.start()
-        time.sleep(.1)
+        self.nvizThread.ready.wait()
         self._display = self.nvizThread.GetDisplay()
+        self._createAttributeSetters()
 
         # GRASS_REGION needed only for initialization
         del os.environ['GRASS_REGION']
 
-        self.img = wx.Image(self.Map.mapfile, wx.BITMAP_TYPE_ANY)
-
         # size of MapWindow, to avoid resizing if size is the same
         self.size = (0, 0)
 
         # default values
         self.nvizDefault = NvizSettings()
-        self.view = copy.deepcopy(
+        self.view = _cloneSettings(
             UserSettings.Get(
                 group='nviz',
                 key='view'))  # copy
         self.iview = UserSettings.Get(
             group='nviz', key='view', settings_type='internal')
-        self.light = copy.deepcopy(
+        self.light = _cloneSettings(
             UserSettings.Get(
                 group='nviz',
                 key='light'))  # copy
@@ -231,6 +293,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         self.Bind(wx.EVT_KEY_UP, self.OnKeyUp)
 
         self.Bind(wx.EVT_CLOSE, self.OnClose)
+        self.Bind(wx.EVT_IDLE, self.OnIdle)
 
         if CheckWxVersion(version=[2, 8, 11]) and \
            sys.platform not in ('win32', 'darwin'):
@@ -364,25 +427,57 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
     def InitCPlanes(self):
         """Initialize cutting planes list"""
+        template = UserSettings.Get(group='nviz', key='cplane')
         for i in range(self._display.GetCPlanesCount()):
-            cplane = copy.deepcopy(
-                UserSettings.Get(
-                    group='nviz',
-                    key='cplane'))
+            cplane = _cloneSettings(template)
             cplane['on'] = False
             self.cplanes.append(cplane)
 
     def SetToolWin(self, toolWin):
         """Sets reference to nviz toolwindow in layer manager"""
         self.toolWin = toolWin
+        # cached widgets belong to the previous toolwindow
+        self._surfaceChoiceWin = None
+        self._cmdToolWindows = None
 
     def GetToolWin(self):
         """Returns reference to nviz toolwindow in layer manager"""
         return self.toolWin
 
+    def _getSurfaceChoiceWin(self):
+        """Get surface choice widget of vector page in nviz toolwindow
+
+        The widget is looked up only once for each toolwindow.
+        """
+        if self._surfaceChoiceWin is None:
+            toolWin = self.lmgr.nviz
+            self._surfaceChoiceWin = toolWin.FindWindowById(
+                toolWin.win['vector']['lines']['surface'])
+        return self._surfaceChoiceWin
+
+    def _getCmdToolWindows(self):
+        """Get widgets of nviz toolwindow read by NvizCmdCommand()
+
+        Returns dictionary with fringe widgets (directions, color,
+        elevation) and cutting plane choice ('cplane').
+
+        The widgets are looked up only once for each toolwindow.
+        """
+        if self._cmdToolWindows is None:
+            toolWin = self.lmgr.nviz
+            self._cmdToolWindows = dict(
+                (key, toolWin.FindWindowById(toolWin.win['fringe'][key]))
+                for key in FRINGE_DIRECTIONS + ('color', 'elev'))
+            self._cmdToolWindows['cplane'] = toolWin.FindWindowById(
+                toolWin.win['cplane']['planes'])
+        return self._cmdToolWindows
+
     def OnClose(self, event):
         self.StopTimer(self.timerAnim)
         self.StopTimer(self.timerFly)
+        if self._quickTimer:
+            self._quickTimer.Stop()
+        self._pendingUpdates.clear()
         # cleanup when window actually closes (on quit) and not just is hidden
         self.UnloadDataLayers(force=True)
 
@@ -391,12 +486,16 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
     def OnSize(self, event):
         size = self.GetClientSize()
+        if self.size == size:
+            # nothing to do, avoid getting context
+            event.Skip()
+            return
+
         if CheckWxVersion(version=[2, 9]):
             context = self.context
         else:
             context = self.GetContext()
-        if self.size != size \
-                and context:
+        if context:
             Debug.msg(3, "GLCanvas.OnSize(): w = %d, h = %d" %
                       (size.width, size.height))
             if CheckWxVersion(version=[2, 9]):
@@ -424,11 +523,20 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         self.DoPaint()
 
     def DoPaint(self):
+        self._setCurrent()
+        self._ensureInit()
+        self.UpdateMap()
+
+    def _setCurrent(self):
+        """Make GL context of the canvas current"""
         if CheckWxVersion(version=[2, 9]):
             self.SetCurrent(self.context)
         else:
             self.SetCurrent()
 
+    def _ensureInit(self):
+        """Synchronize data layers with layer tree, initialize view
+        and nviz toolwindow when painting for the first time"""
         if not self.initView:
             self._display.InitView()
             self.initView = True
@@ -440,11 +548,9 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             self.ResetView()
 
             if hasattr(self.lmgr, "nviz"):
-                self.lmgr.nviz.UpdatePage('view')
-                self.lmgr.nviz.UpdatePage('light')
-                self.lmgr.nviz.UpdatePage('cplane')
-                self.lmgr.nviz.UpdatePage('decoration')
-                self.lmgr.nviz.UpdatePage('animation')
+                for page in ('view', 'light', 'cplane',
+                             'decoration', 'animation'):
+                    self.lmgr.nviz.UpdatePage(page)
                 layer = self.tree.GetSelectedLayer(
                     multi=False, checkedOnly=True)
                 if layer:
@@ -458,12 +564,21 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                 self.lmgr.nviz.UpdateSettings()
 
                 # update widgets
-                win = self.lmgr.nviz.FindWindowById(
-                    self.lmgr.nviz.win['vector']['lines']['surface'])
-                win.SetItems(self.GetLayerNames('raster'))
+                self._getSurfaceChoiceWin().SetItems(
+                    self.GetLayerNames('raster'))
 
             self.init = True
 
+    def _redraw(self):
+        """Redraw map without checking layer tree for changes
+
+        Used when only view has changed (e.g. zooming).
+        """
+        if not self.init:
+            self.DoPaint()
+            return
+
+        self._setCurrent()
         self.UpdateMap()
 
     def DrawImages(self):
@@ -661,11 +776,32 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                                 key='scrollDirection',
                                 subkey='selection'):
                 wheel *= -1
+            # render in quick mode while the wheel is being turned
+            self.render['quick'] = True
             self.DoZoom(zoomtype=wheel, pos=event.GetPosition())
+            if self._quickTimer and self._quickTimer.IsRunning():
+                self._quickTimer.Restart()
+            else:
+                self._quickTimer = wx.CallLater(200, self._finishQuick)
 
         # update statusbar
         # self.parent.StatusbarUpdate()
 
+    def _finishQuick(self):
+        """Render map in full quality after quick mode interaction
+
+        When other interaction (dragging, fly-through, animation) is still
+        in progress, rendering in full quality is postponed.
+        """
+        mouse = wx.GetMouseState()
+        if mouse.LeftIsDown() or mouse.MiddleIsDown() or \
+                mouse.RightIsDown() or self.timerFly.IsRunning() or \
+                self.timerAnim.IsRunning():
+            self._quickTimer.Start()
+            return
+        self.render['quick'] = False
+        self.Refresh(False)
+
     def OnLeftDown(self, event):
         """On left mouse down"""
         self.mouse['begin'] = event.GetPosition()
@@ -743,6 +879,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         size = self.GetClientSize()
         # UL -> LL
         x, y = xyCoords
+        self._flushPending()
         sid, x, y, z = self._display.GetPointOnSurface(x, size[1] - y)
 
         if not sid:
@@ -768,21 +905,22 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             if hasattr(self.lmgr, "nviz"):
                 self.lmgr.nviz.UpdateSettings()
                 x, y = pos[0], self.GetClientSize()[1] - pos[1]
+                self._flushPending()
                 result = self._display.GetPointOnSurface(x, y)
                 if result[0]:
                     self._display.LookHere(x, y)
                     focus = self._display.GetFocus()
                     for i, coord in enumerate(('x', 'y', 'z')):
                         self.iview['focus'][coord] = focus[i]
-                self._display.SetView(
+                self._display.SetViewState(
                     self.view['position']['x'],
                     self.view['position']['y'],
                     self.iview['height']['value'],
                     self.view['persp']['value'],
                     self.view['twist']['value'])
                 self.saveHistory = True
-            # redraw map
-            self.DoPaint()
+            # redraw map, layers did not change
+            self._redraw()
 
     def OnLeftUp(self, event):
         self.mouse['end'] = event.GetPosition()
@@ -858,6 +996,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
     def FocusPanning(self, event):
         """Simulation of panning using focus"""
         size = self.GetClientSize()
+        self._flushPending()
         id1, x1, y1, z1 = self._display.GetPointOnSurface(
             self.mouse['tmp'][0], size[1] - self.mouse['tmp'][1])
         id2, x2, y2, z2 = self._display.GetPointOnSurface(
@@ -882,6 +1021,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         Currently not used.
         """
         size = self.GetClientSize()
+        self._flushPending()
         id1, x1, y1, z1 = self._display.GetPointOnSurface(
             self.mouse['tmp'][0], size[1] - self.mouse['tmp'][1])
         id2, x2, y2, z2 = self._display.GetPointOnSurface(
@@ -891,9 +1031,10 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             dx, dy = x2 - x1, y2 - y1
             # find raster and volume
             for item in self.layers:
-                mapLayer = self.tree.GetLayerInfo(item, key='maplayer')
+                info = self.tree.GetLayerInfo(item)
+                mapLayer = info['maplayer']
 
-                data = self.tree.GetLayerInfo(item, key='nviz')
+                data = info['nviz']
                 if mapLayer.GetType() == 'raster':
                     data['surface']['position']['x'] += dx
                     data['surface']['position']['y'] += dy
@@ -1014,46 +1155,48 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
     def QuerySurface(self, x, y):
         """Query surface on given position"""
+        self._flushPending()
         size = self.GetClientSize()
         result = self._display.QueryMap(x, size[1] - y)
         if result:
             self.qpoints.append((result['x'], result['y'], result['z']))
-            self.log.WriteLog("%-30s: %.3f" % (_("Easting"), result['x']))
-            self.log.WriteLog("%-30s: %.3f" % (_("Northing"), result['y']))
-            self.log.WriteLog("%-30s: %.3f" % (_("Elevation"), result['z']))
             name = ''
             for item in self.layers:
-                if self.tree.GetLayerInfo(item, key='maplayer').type == 'raster' and self.tree.GetLayerInfo(
-                        item, key='nviz')['surface']['object']['id'] == result['id']:
-                    name = self.tree.GetLayerInfo(item, key='maplayer').name
-            self.log.WriteLog("%-30s: %s" % (_("Surface map name"), name))
-            self.log.WriteLog(
-                "%-30s: %s" %
-                (_("Surface map elevation"), result['elevation']))
-            self.log.WriteLog("%-30s: %s" %
-                              (_("Surface map color"), result['color']))
+                info = self.tree.GetLayerInfo(item)
+                if info['maplayer'].type == 'raster' and \
+                        info['nviz']['surface']['object']['id'] == result['id']:
+                    name = info['maplayer'].name
+            lines = ["%-30s: %.3f" % (_("Easting"), result['x']),
+                     "%-30s: %.3f" % (_("Northing"), result['y']),
+                     "%-30s: %.3f" % (_("Elevation"), result['z']),
+                     "%-30s: %s" % (_("Surface map name"), name),
+                     "%-30s: %s" % (_("Surface map elevation"),
+                                    result['elevation']),
+                     "%-30s: %s" % (_("Surface map color"), result['color'])]
             if len(self.qpoints) > 1:
                 prev = self.qpoints[-2]
                 curr = self.qpoints[-1]
-                dxy = math.sqrt(pow(prev[0] - curr[0], 2) +
-                                pow(prev[1] - curr[1], 2))
-                dxyz = math.sqrt(pow(prev[0] - curr[0], 2) +
-                                 pow(prev[1] - curr[1], 2) +
-                                 pow(prev[2] - curr[2], 2))
-                self.log.WriteLog(
+                dx = prev[0] - curr[0]
+                dy = prev[1] - curr[1]
+                dz = prev[2] - curr[2]
+                dxy = math.hypot(dx, dy)
+                dxyz = math.sqrt(dx * dx + dy * dy + dz * dz)
+                lines.append(
                     "%-30s: %.3f" %
                     (_("XY distance from previous"), dxy))
-                self.log.WriteLog(
+                lines.append(
                     "%-30s: %.3f" %
                     (_("XYZ distance from previous"), dxyz))
-                self.log.WriteLog(
+                lines.append(
                     "%-30s: %.3f" %
                     (_("Distance along surface"), self._display.GetDistanceAlongSurface(
                         result['id'], (curr[0], curr[1]), (prev[0], prev[1]), useExag=False)))
-                self.log.WriteLog(
+                lines.append(
                     "%-30s: %.3f" %
                     (_("Distance along exag. surface"), self._display.GetDistanceAlongSurface(
                         result['id'], (curr[0], curr[1]), (prev[0], prev[1]), useExag=True)))
+            # write all lines at once
+            self.log.WriteLog('\n'.join(lines))
             self.log.WriteCmdLog('-' * 80)
         else:
             self.log.WriteLog(_("No point on surface"))
@@ -1092,27 +1235,27 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         """Change view settings"""
         view = self.view
         iview = self.iview
+        zExag = viewdir = focus = None
         if zexag and 'value' in view['z-exag']:
-            self._display.SetZExag(
-                view['z-exag']['value'] /
-                iview['z-exag']['llRatio'])
-
-        self._display.SetView(view['position']['x'], view['position']['y'],
-                              iview['height']['value'],
-                              view['persp']['value'],
-                              view['twist']['value'])
+            zExag = view['z-exag']['value'] / iview['z-exag']['llRatio']
 
         if iview['dir']['use']:
-            self._display.SetViewdir(
-                iview['dir']['x'],
-                iview['dir']['y'],
-                iview['dir']['z'])
+            viewdir = (iview['dir']['x'],
+                       iview['dir']['y'],
+                       iview['dir']['z'])
 
         elif iview['focus']['x'] != -1:
-            self._display.SetFocus(
-                self.iview['focus']['x'],
-                self.iview['focus']['y'],
-                self.iview['focus']['z'])
+            focus = (iview['focus']['x'],
+                     iview['focus']['y'],
+                     iview['focus']['z'])
+
+        self._display.SetViewState(view['position']['x'],
+                                   view['position']['y'],
+                                   iview['height']['value'],
+                                   view['persp']['value'],
+                                   view['twist']['value'],
+                                   z_exag=zExag, viewdir=viewdir,
+                                   focus=focus)
 
         if 'rotation' in iview:
             if iview['rotation']:
@@ -1141,20 +1284,33 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         :param render: re-render map composition
         :type render: bool
         """
-        start = time.clock()
+        # apply pending property changes before drawing
+        self._flushPending()
 
-        self.resize = False
+        # measure time only when it is going to be printed
+        timing = Debug.GetLevel() >= 3
+        if timing:
+            start = time.time()
 
-        if self.render['quick'] is False:
-            if sys.platform != 'darwin':  # causes recursion for some reason on Mac
-                self.parent.GetProgressBar().Show()
-                self.parent.GetProgressBar().SetRange(2)
-                self.parent.GetProgressBar().SetValue(0)
+        self.resize = False
 
+        showProgress = False
         if self.render['quick'] is False:
-            if sys.platform != 'darwin':
-                self.parent.GetProgressBar().SetValue(1)
-            self._display.Draw(False, -1)
+            # causes recursion for some reason on Mac
+            showProgress = self._slowDraw and sys.platform != 'darwin'
+            if showProgress:
+                progress = self.parent.GetProgressBar()
+                progress.Show()
+                if progress.GetRange() != 2:  # changed by nviz library
+                    progress.SetRange(2)
+                progress.SetValue(1)
+            drawStart = time.time()
+            # surfaces, fringe and decorations in one go
+            self._display.DrawFull(
+                self.SwapBuffers,
+                arrow=self.decoration['arrow']['show'],
+                scalebar=bool(self.decoration['scalebar']))
+            self._slowDraw = time.time() - drawStart > 0.1
             if self.saveHistory:
                 self.ViewHistory(view=self.view, iview=self.iview)
                 self.saveHistory = False
@@ -1166,34 +1322,25 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             if self.render['vpoints']:
                 mode |= wxnviz.DRAW_QUICK_VPOINTS
             self._display.Draw(True, mode)
+            self.SwapBuffers()
         else:  # None -> reuse last rendered image
-            pass  # TODO
+            # TODO
+            self.SwapBuffers()
 
-        self.SwapBuffers()
-        # draw fringe after SwapBuffers, otherwise it don't have to be visible
-        # on some computers
-        if self.render['quick'] is False:
-            self._display.DrawFringe()
-            if self.decoration['arrow']['show']:
-                self._display.DrawArrow()
-            if self.decoration['scalebar']:
-                self._display.DrawScalebar()
         if self.imagelist:
             if ((self.render['quick'] and self.dragid > -1) or  # during dragging
                     (not self.render['quick'] and self.dragid < 0)):  # redraw
                 self._display.Start2D()
                 self.DrawImages()
 
-        stop = time.clock()
+        if showProgress:
+            progress.SetValue(2)
+            # hide process bar
+            progress.Hide()
 
-        if self.render['quick'] is False:
-            if sys.platform != 'darwin':
-                self.parent.GetProgressBar().SetValue(2)
-                # hide process bar
-                self.parent.GetProgressBar().Hide()
-
-        Debug.msg(3, "GLWindow.UpdateMap(): quick = %d, -> time = %g" %
-                  (self.render['quick'], (stop - start)))
+        if timing:
+            Debug.msg(3, "GLWindow.UpdateMap(): quick = %d, -> time = %g" %
+                      (self.render['quick'], (time.time() - start)))
 
     def EraseMap(self):
         """Erase the canvas
@@ -1259,8 +1406,9 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
         :param item: layer item
         """
-        layer = self.tree.GetLayerInfo(item, key='maplayer')
-        data = self.tree.GetLayerInfo(item, key='nviz')
+        info = self.tree.GetLayerInfo(item)
+        layer = info['maplayer']
+        data = info['nviz']
 
         if not data:
             return 0
@@ -1280,18 +1428,30 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         # load raster & vector maps
         while item and item.IsOk():
             type = self.tree.GetLayerInfo(item, key='type')
-            if type == 'group':
-                item = self.tree.GetNextItem(item)
-                continue
+            # groups are skipped as well
+            if type in ('raster', 'vector', 'raster_3d') and \
+                    item.IsChecked():
+                litems.append(item)
 
-            if not item.IsChecked() or \
-                    type not in ('raster', 'vector', 'raster_3d'):
-                item = self.tree.GetNextItem(item)
-                continue
+            item = self.tree.GetNextItem(item)
 
-            litems.append(item)
+    def _getEnabledLayers(self):
+        """Get list of enabled map layers in layer tree
 
-            item = self.tree.GetNextItem(item)
+        Layer tree is walked only when it could have changed since the
+        last call (see _invalidateEnabledLayers). The returned list is
+        shared and must not be modified.
+        """
+        if self._enabledLayers is None:
+            self._enabledLayers = []
+            item = self.tree.GetFirstChild(self.tree.root)[0]
+            self._GetDataLayers(item, self._enabledLayers)
+
+        return self._enabledLayers
+
+    def _invalidateEnabledLayers(self):
+        """Force walking layer tree for enabled map layers next time"""
+        self._enabledLayers = None
 
     def LoadDataLayers(self):
         """Load raster/vector from current layer tree
@@ -1302,46 +1462,36 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         if not self.tree:
             return
 
-        listOfItems = []
-        item = self.tree.GetFirstChild(self.tree.root)[0]
-        self._GetDataLayers(item, listOfItems)
+        listOfItems = self._getEnabledLayers()
 
-        start = time.time()
+        timing = Debug.GetLevel() >= 1
+        if timing:
+            start = time.time()
 
-        while(len(listOfItems) > 0):
-            item = listOfItems.pop()
-            type = self.tree.GetLayerInfo(item, key='type')
-            if item in self.layers:
+        # set of loaded layers for constant time lookups below
+        loadedItems = set(self.layers)
+
+        # bottom-up, as the layers were always loaded
+        for item in reversed(listOfItems):
+            if item in loadedItems:
                 continue
+            info = self.tree.GetLayerInfo(item)
             # "raster (double click to set properties)" - tries to load this
             # layer - no idea how to fix it
-            if ' ' in self.tree.GetLayerInfo(item, key='maplayer').name:
+            if ' ' in info['maplayer'].name:
                 return
+            loader = self._loaders.get(info['type'])
+            if not loader:
+                continue
             try:
-                if type == 'raster':
-                    self.LoadRaster(item)
-                elif type == 'raster_3d':
-                    self.LoadRaster3d(item)
-                elif type == 'vector':
-                    layer = self.tree.GetLayerInfo(item, key='maplayer')
-                    vInfo = grass.vector_info_topo(layer.GetName())
-                    if (vInfo['points']) > 0:
-                        # include vInfo['centroids'] to initially load
-                        # centroids
-                        self.LoadVector(item, points=True)
-                    if (vInfo['lines'] + vInfo['boundaries']) > 0:
-                        self.LoadVector(item, points=False)
-                    if vInfo['map3d'] and(
-                            vInfo['kernels'] + vInfo['faces']) > 0:
-                        self.LoadVector(item, points=None)
-
+                loader(item, info)
             except GException as e:
                 GError(parent=self,
                        message=e.value)
 
-        stop = time.time()
-
-        Debug.msg(1, "GLWindow.LoadDataLayers(): time = %f" % (stop - start))
+        if timing:
+            Debug.msg(1, "GLWindow.LoadDataLayers(): time = %f" %
+                      (time.time() - start))
 
     def UnloadDataLayers(self, force=False):
         """Unload any layers that have been deleted from layer tree
@@ -1353,31 +1503,26 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
         listOfItems = []
         if not force:
-            item = self.tree.GetFirstChild(self.tree.root)[0]
-            self._GetDataLayers(item, listOfItems)
+            listOfItems = self._getEnabledLayers()
 
-        start = time.time()
+        timing = Debug.GetLevel() >= 1
+        if timing:
+            start = time.time()
+
+        # set of enabled layers for constant time lookups below
+        enabledItems = set(listOfItems)
 
         update = False
         layersTmp = self.layers[:]
         for layer in layersTmp:
-            if layer in listOfItems:
+            if layer in enabledItems:
+                continue
+            info = self.tree.GetLayerInfo(layer)
+            unloader = self._unloaders.get(info['type'])
+            if not unloader:
                 continue
-            ltype = self.tree.GetLayerInfo(layer, key='type')
             try:
-                if ltype == 'raster':
-                    self.UnloadRaster(layer)
-                elif ltype == 'raster_3d':
-                    self.UnloadRaster3d(layer)
-                elif ltype == 'vector':
-                    maplayer = self.tree.GetLayerInfo(layer, key='maplayer')
-                    vInfo = grass.vector_info_topo(maplayer.GetName())
-                    if (vInfo['points'] + vInfo['centroids']) > 0:
-                        self.UnloadVector(layer, points=True)
-                    if (vInfo['lines'] + vInfo['boundaries']
-                        ) > 0 or vInfo['map3d']:
-                        self.UnloadVector(layer, points=False)
-
+                unloader(layer, info)
             except GException as e:
                 GError(parent=self,
                        message=e.value)
@@ -1389,9 +1534,9 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             self.lmgr.nviz.UpdateSettings()
             self.UpdateView(None)
 
-        stop = time.time()
-
-        Debug.msg(1, "GLWindow.UnloadDataLayers(): time = %f" % (stop - start))
+        if timing:
+            Debug.msg(1, "GLWindow.UnloadDataLayers(): time = %f" %
+                      (time.time() - start))
 
     def SetVectorSurface(self, data):
         """Set reference surfaces of vector"""
@@ -1433,9 +1578,10 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         :param nvizType: nviz data type (surface, points, vector)
         """
         if nvizType != 'constant':
-            mapType = self.tree.GetLayerInfo(item, key='maplayer').type
+            info = self.tree.GetLayerInfo(item)
+            mapType = info['maplayer'].type
             # reference to original layer properties (can be None)
-            data = self.tree.GetLayerInfo(item, key='nviz')
+            data = info['nviz']
         else:
             mapType = nvizType
             data = self.constants[item]
@@ -1444,7 +1590,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             # init data structure
             if nvizType != 'constant':
                 self.tree.SetLayerInfo(item, key='nviz', value={})
-                data = self.tree.GetLayerInfo(item, key='nviz')
+                data = info['nviz']
 
             if mapType == 'raster':
                 # reset to default properties
@@ -1479,19 +1625,18 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                     self.nvizDefault.SetVectorPointsDefaultProp(
                         data['vector']['points'], self._display.GetLongDim())
             # set updates
-            for sec in data.keys():
-                for sec1 in data[sec].keys():
-                    if sec1 == 'position':
-                        data[sec][sec1]['update'] = None
-                        continue
-                    if isinstance(data[sec][sec1], dict):
-                        for sec2 in data[sec][sec1].keys():
-                            if sec2 not in ('all', 'init', 'id'):
-                                data[sec][sec1][sec2]['update'] = None
-                    elif isinstance(data[sec][sec1], list):
-                        for i in range(len(data[sec][sec1])):
-                            for sec2 in data[sec][sec1][i].keys():
-                                data[sec][sec1][i][sec2]['update'] = None
+            for sec in six.itervalues(data):
+                for key1, sec1 in six.iteritems(sec):
+                    if key1 == 'position':
+                        sec1['update'] = None
+                    elif isinstance(sec1, dict):
+                        for key2, sec2 in six.iteritems(sec1):
+                            if key2 not in ('all', 'init', 'id'):
+                                sec2['update'] = None
+                    elif isinstance(sec1, list):
+                        for sec2 in sec1:
+                            for prop in six.itervalues(sec2):
+                                prop['update'] = None
             event = wxUpdateProperties(data=data)
             wx.PostEvent(self, event)
 
@@ -1506,6 +1651,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             elif mapType == 'constant':
                 data[nvizType]['object'] = {'id': id,
                                             'init': False}
+            self._invalidateLayersCache()
 
         return data
 
@@ -1523,12 +1669,15 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         """
         return self._loadRaster(item)
 
-    def _loadRaster(self, item):
+    def _loadRaster(self, item, info=None):
         """Load 2d/3d raster map and set its attributes
 
         :param layer: item
+        :param info: layer info of item (None to get it from layer tree)
         """
-        layer = self.tree.GetLayerInfo(item, key='maplayer')
+        if info is None:
+            info = self.tree.GetLayerInfo(item)
+        layer = info['maplayer']
 
         if layer.type not in ('raster', 'raster_3d'):
             return
@@ -1555,6 +1704,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                     layer.type)
 
         self.layers.append(item)
+        self._invalidateLayersCache()
 
         # set default/workspace layer properties
         data = self.SetMapObjProperties(item, id, nvizType)
@@ -1567,11 +1717,9 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         if hasattr(
                 self.lmgr, "nviz") and item == self.tree.GetSelectedLayer(
                 multi=False, checkedOnly=True):
-            toolWin = self.lmgr.nviz
             if layer.type == 'raster':
-                win = toolWin.FindWindowById(
-                    toolWin.win['vector']['lines']['surface'])
-                win.SetItems(self.GetLayerNames(layer.type))
+                self._getSurfaceChoiceWin().SetItems(
+                    self.GetLayerNames(layer.type))
 
             # toolWin.UpdatePage(nvizType)
             # toolWin.SetPage(nvizType)
@@ -1656,17 +1804,20 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         """
         return self._unloadRaster(item)
 
-    def _unloadRaster(self, item):
+    def _unloadRaster(self, item, info=None):
         """Unload 2d/3d raster map
 
         :param item: layer item
+        :param info: layer info of item (None to get it from layer tree)
         """
-        layer = self.tree.GetLayerInfo(item, key='maplayer')
+        if info is None:
+            info = self.tree.GetLayerInfo(item)
+        layer = info['maplayer']
 
         if layer.type not in ('raster', 'raster_3d'):
             return
 
-        data = self.tree.GetLayerInfo(item, key='nviz')
+        data = info['nviz']
 
         if layer.type == 'raster':
             nvizType = 'surface'
@@ -1694,14 +1845,14 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         data[nvizType].pop('object')
 
         self.layers.remove(item)
+        self._invalidateLayersCache()
 
         # update tools window
         if hasattr(self.lmgr, "nviz"):
             toolWin = self.lmgr.nviz
             if layer.type == 'raster':
-                win = toolWin.FindWindowById(
-                    toolWin.win['vector']['lines']['surface'])
-                win.SetItems(self.GetLayerNames(layer.type))
+                self._getSurfaceChoiceWin().SetItems(
+                    self.GetLayerNames(layer.type))
                 win = toolWin.FindWindowById(toolWin.win['surface']['map'])
                 win.SetValue('')
             if layer.type == 'raster_3d':
@@ -1711,15 +1862,18 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                 win = toolWin.FindWindowById(toolWin.win['vector']['map'])
                 win.SetValue('')
 
-    def LoadVector(self, item, points=None, append=True):
+    def LoadVector(self, item, points=None, append=True, info=None):
         """Load 2D or 3D vector map overlay
 
         :param item: layer item
         :param points: True to load points, False to load lines, None
                        to load both
         :param bool append: append vector to layer list
+        :param info: layer info of item (None to get it from layer tree)
         """
-        layer = self.tree.GetLayerInfo(item, key='maplayer')
+        if info is None:
+            info = self.tree.GetLayerInfo(item)
+        layer = info['maplayer']
         if layer.type != 'vector':
             return
 
@@ -1736,13 +1890,10 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             vecTypes = ('lines', )
 
         id = -1
+        name = str(layer.GetName())
         for vecType in vecTypes:
-            if vecType == 'lines':
-                id, baseId = self._display.LoadVector(
-                    str(layer.GetName()), False)
-            else:
-                id, baseId = self._display.LoadVector(
-                    str(layer.GetName()), True)
+            id, baseId = self._display.LoadVector(name,
+                                                  vecType == 'points')
             if id < 0:
                 self.log.WriteError(
                     _("Loading vector map <%(name)s> (%(type)s) failed") %
@@ -1754,10 +1905,10 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             self.baseId = baseId
         if append:
             self.layers.append(item)
+            self._invalidateLayersCache()
 
         # update properties
-        data = self.tree.GetLayerInfo(item, key='nviz')
-        event = wxUpdateProperties(data=data)
+        event = wxUpdateProperties(data=info['nviz'])
         wx.PostEvent(self, event)
 
         # update tools window
@@ -1771,16 +1922,49 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
         return id
 
-    def UnloadVector(self, item, points=None, remove=True):
+    def _loadVectorLayer(self, item, info):
+        """Load features (points, lines, 3D features) of vector map
+
+        :param item: layer item
+        :param info: layer info of item
+        """
+        vInfo = grass.vector_info_topo(info['maplayer'].GetName())
+        if (vInfo['points']) > 0:
+            # include vInfo['centroids'] to initially load
+            # centroids
+            self.LoadVector(item, points=True, info=info)
+        if (vInfo['lines'] + vInfo['boundaries']) > 0:
+            self.LoadVector(item, points=False, info=info)
+        if vInfo['map3d'] and(
+                vInfo['kernels'] + vInfo['faces']) > 0:
+            self.LoadVector(item, points=None, info=info)
+
+    def _unloadVectorLayer(self, item, info):
+        """Unload features (points, lines) of vector map
+
+        :param item: layer item
+        :param info: layer info of item
+        """
+        vInfo = grass.vector_info_topo(info['maplayer'].GetName())
+        if (vInfo['points'] + vInfo['centroids']) > 0:
+            self.UnloadVector(item, points=True, info=info)
+        if (vInfo['lines'] + vInfo['boundaries']
+            ) > 0 or vInfo['map3d']:
+            self.UnloadVector(item, points=False, info=info)
+
+    def UnloadVector(self, item, points=None, remove=True, info=None):
         """Unload vector map overlay
 
         :param item: layer item
         :param points, lines: True to unload given feature type
         :param remove: remove layer from list
         :type remove: bool
+        :param info: layer info of item (None to get it from layer tree)
         """
-        layer = self.tree.GetLayerInfo(item, key='maplayer')
-        data = self.tree.GetLayerInfo(item, key='nviz')['vector']
+        if info is None:
+            info = self.tree.GetLayerInfo(item)
+        layer = info['maplayer']
+        data = info['nviz']['vector']
 
         # if vecType is None:
         #     vecType = []
@@ -1820,6 +2004,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
         if remove and item in self.layers:
             self.layers.remove(item)
+        self._invalidateLayersCache()
 
     def ResetView(self):
         """Reset to default view"""
@@ -1832,15 +2017,15 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         # TODO find more precise way or better rewrite it in OGSF
         self.iview['z-exag']['llRatio'] = 1
         if grass.locn_is_latlong():
+            region = grass.region()
             self.iview['z-exag']['llRatio'] = math.pi / 180 * 6371000 * math.cos(
-                (grass.region()['n'] + grass.region()['s']) / 2)
+                (region['n'] + region['s']) / 2)
 
+        viewSettings = UserSettings.Get(group='nviz', key='view')
         self.view[
             'z-exag']['value'] = round(zexagOriginal * self.iview['z-exag']['llRatio'])
-        self.view['z-exag']['min'] = UserSettings.Get(group='nviz', key='view',
-                                                      subkey=('z-exag', 'min'))
-        zexagMax = UserSettings.Get(group='nviz', key='view',
-                                    subkey=('z-exag', 'max'))
+        self.view['z-exag']['min'] = viewSettings['z-exag']['min']
+        zexagMax = viewSettings['z-exag']['max']
         if zexagMax <= self.view['z-exag']['value']:
             self.view['z-exag']['max'] = self.view['z-exag']['value'] * 2
         elif self.view['z-exag']['value'] < 1:
@@ -1850,15 +2035,11 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         else:
             self.view['z-exag']['max'] = zexagMax
 
-        self.view['position']['x'] = UserSettings.Get(group='nviz', key='view',
-                                                      subkey=('position', 'x'))
-        self.view['position']['y'] = UserSettings.Get(group='nviz', key='view',
-                                                      subkey=('position', 'y'))
-        self.view['persp']['value'] = UserSettings.Get(
-            group='nviz', key='view', subkey=('persp', 'value'))
+        self.view['position']['x'] = viewSettings['position']['x']
+        self.view['position']['y'] = viewSettings['position']['y']
+        self.view['persp']['value'] = viewSettings['persp']['value']
 
-        self.view['twist']['value'] = UserSettings.Get(
-            group='nviz', key='view', subkey=('twist', 'value'))
+        self.view['twist']['value'] = viewSettings['twist']['value']
         self._display.ResetRotation()
         self.iview['rotation'] = None
         self._display.LookAtCenter()
@@ -1868,9 +2049,41 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         self.PostViewEvent()
 
     def UpdateMapObjProperties(self, event):
-        """Generic method to update data layer properties"""
-        data = event.data
+        """Generic method to update data layer properties
+
+        Updates are not applied immediately but collected and applied
+        together before next rendering or query (or when idle), so that
+        many events (e.g. when dragging slider) result in one update.
+        """
+        self._pendingUpdates[id(event.data)] = event.data
+
+    def OnIdle(self, event):
+        """Apply pending data layer properties updates when idle"""
+        self._flushPending()
+        event.Skip()
+
+    def _flushPending(self):
+        """Apply pending data layer properties updates
+
+        Must be called before rendering or querying data layers.
+        """
+        pending = self._pendingUpdates
+        while pending:
+            key = next(iter(pending))
+            error = None
+            try:
+                self._updateMapObjProperties(pending[key])
+            except GException as e:
+                error = e.value
+            # drop only when applied (or failed), before error dialog
+            # lets other events (and flushing) be processed
+            pending.pop(key, None)
+            if error:
+                GError(parent=self,
+                       message=error)
 
+    def _updateMapObjProperties(self, data):
+        """Update data layer properties given by data dictionary"""
         if 'surface' in data:
             try:
                 id = data['surface']['object']['id']
@@ -1881,24 +2094,31 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             data['surface']['object']['init'] = True
 
         elif 'constant' in data:
-            id = data['constant']['object']['id']
+            try:
+                id = data['constant']['object']['id']
+            except KeyError:  # unloaded in the meantime
+                return
             self.UpdateConstantProperties(id, data['constant'])
             # -> initialized
             data['constant']['object']['init'] = True
 
         elif 'volume' in data:
-            id = data['volume']['object']['id']
+            try:
+                id = data['volume']['object']['id']
+            except KeyError:  # unloaded in the meantime
+                return
             self.UpdateVolumeProperties(id, data['volume'])
             # -> initialized
             data['volume']['object']['init'] = True
 
         elif 'vector' in data:
-            for type in ('lines', 'points'):
-                if 'object' in data['vector'][type]:
-                    id = data['vector'][type]['object']['id']
-                    self.UpdateVectorProperties(id, data['vector'], type)
+            for type, update in (('lines', self.UpdateVectorLinesProperties),
+                                 ('points', self.UpdateVectorPointsProperties)):
+                vdata = data['vector'][type]
+                if 'object' in vdata:
+                    update(vdata['object']['id'], vdata)
                     # -> initialized
-                    data['vector'][type]['object']['init'] = True
+                    vdata['object']['init'] = True
 
     def UpdateConstantProperties(self, id, data):
         """Update surface map object properties"""
@@ -1910,116 +2130,132 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         else:
             self._display.SetSurfaceTransp(id, map=False, value=data['transp'])
 
+    def _createAttributeSetters(self):
+        """Create dispatch tables of functions setting surface and
+        isosurface attributes
+
+        Each attribute maps to (set function, unset function), called
+        with map flag and value; missing function means no action.
+        """
+        display = self._display
+        # TODO: invert mask
+        # TODO: broken in NVIZ
+        self._surfaceAttrSetters = {
+            'color': (display.SetSurfaceColor, None),
+            'mask': (lambda id, map, value: display.SetSurfaceMask(id, False, value),
+                     lambda id, map, value: display.UnsetSurfaceMask(id)),
+            'transp': (display.SetSurfaceTransp,
+                       lambda id, map, value: display.UnsetSurfaceTransp(id)),
+            'shine': (display.SetSurfaceShine, None)}
+        self._isosurfAttrSetters = {
+            'topo': (None, display.SetIsosurfaceTopo),
+            'color': (display.SetIsosurfaceColor, None),
+            'mask': (lambda id, isosurfId, map, value:
+                     display.SetIsosurfaceMask(id, isosurfId, False, value),
+                     lambda id, isosurfId, map, value:
+                     display.UnsetIsosurfaceMask(id, isosurfId)),
+            'transp': (display.SetIsosurfaceTransp,
+                       lambda id, isosurfId, map, value:
+                       display.UnsetIsosurfaceTransp(id, isosurfId)),
+            'shine': (display.SetIsosurfaceShine, None)}
+
     def UpdateSurfaceProperties(self, id, data):
         """Update surface map object properties"""
+        attributes = data['attribute']
+        draw = data['draw']
         # surface attributes
         for attrb in ('color', 'mask',
                       'transp', 'shine'):
-            if attrb not in data['attribute'] or \
-                    'update' not in data['attribute'][attrb]:
+            attr = attributes.get(attrb)
+            if attr is None or 'update' not in attr:
                 continue
 
-            map = data['attribute'][attrb]['map']
-            value = data['attribute'][attrb]['value']
+            map = attr['map']
+            value = attr['value']
 
+            sval = str(value)
+            setter, unsetter = self._surfaceAttrSetters[attrb]
             if map is None:  # unset
                 # only optional attributes
-                if attrb == 'mask':
-                    # TODO: invert mask
-                    # TODO: broken in NVIZ
-                    self._display.UnsetSurfaceMask(id)
-                elif attrb == 'transp':
-                    self._display.UnsetSurfaceTransp(id)
+                if unsetter:
+                    unsetter(id, map, sval)
             else:
                 if isinstance(value, str):
-                    if len(value) == 0:  # ignore empty values (TODO: warning)
+                    if not value:  # ignore empty values (TODO: warning)
                         continue
                     if map and not grass.find_file(value, element='cell')[
                             'fullname']:
                         continue
-                if attrb == 'color':
-                    self._display.SetSurfaceColor(id, map, str(value))
-                elif attrb == 'mask':
-                    # TODO: invert mask
-                    # TODO: broken in NVIZ
-                    self._display.SetSurfaceMask(id, False, str(value))
-                elif attrb == 'transp':
-                    self._display.SetSurfaceTransp(id, map, str(value))
-                elif attrb == 'shine':
-                    self._display.SetSurfaceShine(id, map, str(value))
-            data['attribute'][attrb].pop('update')
-
-        # draw res
-        if 'update' in data['draw']['resolution']:
-            coarse = data['draw']['resolution']['coarse']
-            fine = data['draw']['resolution']['fine']
-
-            if data['draw']['all']:
-                self._display.SetSurfaceRes(-1, fine, coarse)
-            else:
-                self._display.SetSurfaceRes(id, fine, coarse)
-            data['draw']['resolution'].pop('update')
+                if setter:
+                    setter(id, map, sval)
+            attr.pop('update')
+
+        # all surfaces or only this one
+        drawId = -1 if draw['all'] else id
+
+        # draw res, style and wire color (set in one call)
+        res = style = wire = None
+        resolution = draw['resolution']
+        if _popUpdate(resolution):
+            res = (resolution['fine'], resolution['coarse'])
 
         # draw style
-        if 'update' in data['draw']['mode']:
-            if data['draw']['mode']['value'] < 0:  # need to calculate
-                data['draw']['mode']['value'] = self.nvizDefault.GetDrawMode(
-                    mode=data['draw']['mode']['desc']['mode'],
-                    style=data['draw']['mode']['desc']['style'],
-                    shade=data['draw']['mode']['desc']['shading'],
+        mode = draw['mode']
+        if _popUpdate(mode):
+            if mode['value'] < 0:  # need to calculate
+                mode['value'] = self.nvizDefault.GetDrawMode(
+                    mode=mode['desc']['mode'],
+                    style=mode['desc']['style'],
+                    shade=mode['desc']['shading'],
                     string=True)
-            style = data['draw']['mode']['value']
-            if data['draw']['all']:
-                self._display.SetSurfaceStyle(-1, style)
-            else:
-                self._display.SetSurfaceStyle(id, style)
-            data['draw']['mode'].pop('update')
+            style = mode['value']
 
         # wire color
-        if 'update' in data['draw']['wire-color']:
-            color = data['draw']['wire-color']['value']
-            if data['draw']['all']:
-                self._display.SetWireColor(-1, str(color))
-            else:
-                self._display.SetWireColor(id, str(color))
-            data['draw']['wire-color'].pop('update')
+        wireColor = draw['wire-color']
+        if _popUpdate(wireColor):
+            wire = str(wireColor['value'])
+
+        if res is not None or style is not None or wire is not None:
+            self._display.SetSurfaceDrawState(drawId, res=res, style=style,
+                                              color_str=wire)
 
         # position
-        if 'update' in data['position']:
-            x = data['position']['x']
-            y = data['position']['y']
-            z = data['position']['z']
-            self._display.SetSurfacePosition(id, x, y, z)
-            data['position'].pop('update')
-        data['draw']['all'] = False
+        position = data['position']
+        if _popUpdate(position):
+            self._display.SetSurfacePosition(id, position['x'],
+                                             position['y'],
+                                             position['z'])
+        draw['all'] = False
 
     def UpdateVolumeProperties(self, id, data, isosurfId=None):
         """Update volume (isosurface/slice) map object properties"""
-        if 'update' in data['draw']['resolution']:
-            if data['draw']['mode']['value'] == 0:
+        draw = data['draw']
+        isosurfMode = draw['mode']['value'] == 0
+        resolution = draw['resolution']
+        if _popUpdate(resolution):
+            if isosurfMode:
                 self._display.SetIsosurfaceRes(
-                    id, data['draw']['resolution']['isosurface']['value'])
+                    id, resolution['isosurface']['value'])
             else:
                 self._display.SetSliceRes(
-                    id, data['draw']['resolution']['slice']['value'])
-            data['draw']['resolution'].pop('update')
+                    id, resolution['slice']['value'])
 
-        if 'update' in data['draw']['shading']:
-            if data['draw']['mode']['value'] == 0:
-                if data['draw']['shading']['isosurface'][
+        shading = draw['shading']
+        if _popUpdate(shading):
+            if isosurfMode:
+                if shading['isosurface'][
                         'value'] < 0:  # need to calculate
-                    mode = data['draw']['shading']['isosurface']['value'] = \
-                        self.nvizDefault.GetDrawMode(shade=data['draw']['shading']['isosurface'],
+                    mode = shading['isosurface']['value'] = \
+                        self.nvizDefault.GetDrawMode(shade=shading['isosurface'],
                                                      string=False)
                     self._display.SetIsosurfaceMode(id, mode)
             else:
-                if data['draw']['shading']['slice'][
+                if shading['slice'][
                         'value'] < 0:  # need to calculate
-                    mode = data['draw']['shading']['slice']['value'] = \
-                        self.nvizDefault.GetDrawMode(shade=data['draw']['shading']['slice'],
+                    mode = shading['slice']['value'] = \
+                        self.nvizDefault.GetDrawMode(shade=shading['slice'],
                                                      string=False)
                     self._display.SetSliceMode(id, mode)
-            data['draw']['shading'].pop('update')
 
         #
         # isosurface attributes
@@ -2029,45 +2265,28 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             self._display.AddIsosurface(id, 0, isosurf_id=isosurfId)
             for attrb in ('topo', 'color', 'mask',
                           'transp', 'shine'):
-                if attrb not in isosurf or \
-                        'update' not in isosurf[attrb]:
+                attr = isosurf.get(attrb)
+                if attr is None or 'update' not in attr:
                     continue
-                map = isosurf[attrb]['map']
-                value = isosurf[attrb]['value']
+                map = attr['map']
+                value = attr['value']
 
+                sval = str(value)
+                setter, unsetter = self._isosurfAttrSetters[attrb]
                 if map is None:  # unset
                     # only optional attributes
-                    if attrb == 'topo':
-                        self._display.SetIsosurfaceTopo(
-                            id, isosurfId, map, str(value))
-                    elif attrb == 'mask':
-                        # TODO: invert mask
-                        # TODO: broken in NVIZ
-                        self._display.UnsetIsosurfaceMask(id, isosurfId)
-                    elif attrb == 'transp':
-                        self._display.UnsetIsosurfaceTransp(id, isosurfId)
+                    if unsetter:
+                        unsetter(id, isosurfId, map, sval)
                 else:
                     if isinstance(value, str):
-                        if len(value) == 0:  # ignore empty values (TODO: warning)
+                        if not value:  # ignore empty values (TODO: warning)
                             continue
                         if map and not grass.find_file(value, element='grid3')[
                                 'fullname']:
                             continue
-                    if attrb == 'color':
-                        self._display.SetIsosurfaceColor(
-                            id, isosurfId, map, str(value))
-                    elif attrb == 'mask':
-                        # TODO: invert mask
-                        # TODO: broken in NVIZ
-                        self._display.SetIsosurfaceMask(
-                            id, isosurfId, False, str(value))
-                    elif attrb == 'transp':
-                        self._display.SetIsosurfaceTransp(
-                            id, isosurfId, map, str(value))
-                    elif attrb == 'shine':
-                        self._display.SetIsosurfaceShine(
-                            id, isosurfId, map, str(value))
-                isosurf[attrb].pop('update')
+                    if setter:
+                        setter(id, isosurfId, map, sval)
+                attr.pop('update')
             isosurfId += 1
         #
         # slice attributes
@@ -2075,7 +2294,7 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
         sliceId = 0
         for slice in data['slice']:
             ret = self._display.AddSlice(id, slice_id=sliceId)
-            if 'update' in slice['position']:
+            if _popUpdate(slice['position']):
                 pos = slice['position']
                 ret = self._display.SetSlicePosition(
                     id, sliceId, pos['x1'],
@@ -2086,19 +2305,18 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                     pos['z2'],
                     pos['axis'])
 
-                slice['position'].pop('update')
-            if 'update' in slice['transp']:
+            if _popUpdate(slice['transp']):
                 tr = slice['transp']['value']
                 self._display.SetSliceTransp(id, sliceId, tr)
             sliceId += 1
 
         # position
-        if 'update' in data['position'] and 'x' in data['position']:
-            x = data['position']['x']
-            y = data['position']['y']
-            z = data['position']['z']
-            self._display.SetVolumePosition(id, x, y, z)
-            data['position'].pop('update')
+        position = data['position']
+        if 'update' in position and 'x' in position:
+            self._display.SetVolumePosition(id, position['x'],
+                                            position['y'],
+                                            position['z'])
+            position.pop('update')
 
     def UpdateVectorProperties(self, id, data, type):
         """Update vector layer properties
@@ -2160,12 +2378,12 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             data['thematic'].pop('update')
         # surface
         if 'surface' in data['mode'] and 'update' in data['mode']:
-            for item in range(len(data['mode']['surface']['value'])):
+            surface = data['mode']['surface']
+            for name, show in zip(surface['value'], surface['show']):
                 for type in ('raster', 'constant'):
-                    sid = self.GetLayerId(
-                        type=type, name=data['mode']['surface']['value'][item])
+                    sid = self.GetLayerId(type=type, name=name)
                     if sid > -1:
-                        if data['mode']['surface']['show'][item]:
+                        if show:
                             self._display.SetVectorLineSurface(id, sid)
                         else:
                             self._display.UnsetVectorLineSurface(id, sid)
@@ -2232,18 +2450,29 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                 self._display.SetVectorPointZMode(id, True)
             elif 'surface' in data['mode']:
                 self._display.SetVectorPointZMode(id, False)
-                for item in range(len(data['mode']['surface']['value'])):
+                surface = data['mode']['surface']
+                for name, show in zip(surface['value'], surface['show']):
                     for type in ('raster', 'constant'):
-                        sid = self.GetLayerId(
-                            type=type, name=data['mode']['surface']['value'][item])
+                        sid = self.GetLayerId(type=type, name=name)
                         if sid > -1:
-                            if data['mode']['surface']['show'][item]:
+                            if show:
                                 self._display.SetVectorPointSurface(id, sid)
                             else:
                                 self._display.UnsetVectorPointSurface(id, sid)
                             break
             data['mode'].pop('update')
 
+    def _invalidateLayersCache(self):
+        """Invalidate cached information about loaded map layers
+
+        Must be called whenever list of loaded layers or their object
+        ids change.
+        """
+        self._layerNamesCache.clear()
+        self._layerIdCache.clear()
+        # layers are (un)loaded also when checked in layer tree
+        self._invalidateEnabledLayers()
+
     def GetLayerNames(self, type):
         """Return list of map layer names of given type"""
         layerName = []
@@ -2252,13 +2481,14 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             for item in self.constants:
                 layerName.append(_("constant#") +
                                  str(item['constant']['object']['name']))
+        elif type in self._layerNamesCache:
+            layerName.extend(self._layerNamesCache[type])
         else:
             for item in self.layers:
-                mapLayer = self.tree.GetLayerInfo(item, key='maplayer')
-                if type != mapLayer.GetType():
-                    continue
-
-                layerName.append(mapLayer.GetName())
+                mapLayer = self.tree.GetLayerInfo(item)['maplayer']
+                if type == mapLayer.GetType():
+                    layerName.append(mapLayer.GetName())
+            self._layerNamesCache[type] = tuple(layerName)
 
         return layerName
 
@@ -2273,13 +2503,23 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                                         ['object']['name']) == name:
                     return item['constant']['object']['id']
 
+        key = (type, name, vsubtyp)
+        id = self._layerIdCache.get(key)
+        if id is None:
+            id = self._layerIdCache[key] = self._findLayerId(
+                type, name, vsubtyp)
+        return id
+
+    def _findLayerId(self, type, name, vsubtyp):
+        """Find object id of loaded map layer or -1"""
         for item in self.layers:
-            mapLayer = self.tree.GetLayerInfo(item, key='maplayer')
+            info = self.tree.GetLayerInfo(item)
+            mapLayer = info['maplayer']
             if type !=  mapLayer.GetType() or \
                     name != mapLayer.GetName():
                 continue
 
-            data = self.tree.GetLayerInfo(item, key='nviz')
+            data = info['nviz']
 
             try:
                 if type == 'raster':
@@ -2298,9 +2538,10 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
     def ReloadLayersData(self):
         """Delete nviz data of all loaded layers and reload them from current settings"""
         for item in self.layers:
-            type = self.tree.GetLayerInfo(item, key='type')
-            layer = self.tree.GetLayerInfo(item, key='maplayer')
-            data = self.tree.GetLayerInfo(item, key='nviz')
+            info = self.tree.GetLayerInfo(item)
+            type = info['type']
+            layer = info['maplayer']
+            data = info['nviz']
 
             if type == 'raster':
                 self.nvizDefault.SetSurfaceDefaultProp(data['surface'])
@@ -2314,322 +2555,301 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
                         data
                         ['vector']
                         ['lines'])
+        self._invalidateLayersCache()
 
     def NvizCmdCommand(self):
         """Generate command for m.nviz.image according to current state"""
-        cmd = 'm.nviz.image '
+        # command is collected in parts and joined at the end
+        parts = ['m.nviz.image ']
 
+        # layer info of loaded layers
         rasters = []
         vectors = []
         volumes = []
         for item in self.layers:
-            if self.tree.GetLayerInfo(item, key='type') == 'raster':
-                rasters.append(item)
-            elif self.tree.GetLayerInfo(item, key='type') == 'raster_3d':
-                volumes.append(item)
-            elif self.tree.GetLayerInfo(item, key='type') == 'vector':
-                vectors.append(item)
+            info = self.tree.GetLayerInfo(item)
+            if info['type'] == 'raster':
+                rasters.append(info)
+            elif info['type'] == 'raster_3d':
+                volumes.append(info)
+            elif info['type'] == 'vector':
+                vectors.append(info)
         # if not rasters and not self.constants:
         # return _("At least one raster map required")
         # elevation_map/elevation_value
-        if self.constants:
-            subcmd = "elevation_value="
-            for constant in self.constants:
-                subcmd += "%d," % constant['constant']['value']
-            subcmd = subcmd.strip(', ') + ' '
-            cmd += subcmd
+        constants = self.constants
+        if constants:
+            parts.append("elevation_value=%s " % ','.join(
+                "%d" % constant['constant']['value'] for constant in constants))
         if rasters:
-            subcmd = "elevation_map="
-            for item in rasters:
-                subcmd += "%s," % self.tree.GetLayerInfo(
-                    item, key='maplayer').GetName()
-            subcmd = subcmd.strip(', ') + ' '
-            cmd += subcmd
+            parts.append("elevation_map=%s " % ','.join(
+                info['maplayer'].GetName() for info in rasters))
             #
             # draw mode
             #
-            cmdMode = "mode="
-            cmdFine = "resolution_fine="
-            cmdCoarse = "resolution_coarse="
-            cmdShading = "shading="
-            cmdStyle = "style="
-            cmdWire = "wire_color="
+            # draw settings of each surface written to the command
+            sigs = [(d['mode']['desc']['mode'],
+                     d['resolution']['fine'],
+                     d['resolution']['coarse'],
+                     d['mode']['desc']['shading'],
+                     d['mode']['desc']['style'],
+                     d['wire-color']['value'])
+                    for d in (info['nviz']['surface']['draw']
+                              for info in rasters)]
             # test -a flag
-            flag_a = "-a "
-            nvizDataFirst = self.tree.GetLayerInfo(
-                rasters[0], key='nviz')['surface']['draw']
-            for item in rasters:
-                nvizData = self.tree.GetLayerInfo(item, key='nviz')[
-                    'surface']['draw']
-                if nvizDataFirst != nvizData:
-                    flag_a = ""
-            cmd += flag_a
-            for item in rasters:
-                nvizData = self.tree.GetLayerInfo(item, key='nviz')[
-                    'surface']['draw']
-
-                cmdMode += "%s," % nvizData['mode']['desc']['mode']
-                cmdFine += "%s," % nvizData['resolution']['fine']
-                cmdCoarse += "%s," % nvizData['resolution']['coarse']
-                cmdShading += "%s," % nvizData['mode']['desc']['shading']
-                cmdStyle += "%s," % nvizData['mode']['desc']['style']
-                cmdWire += "%s," % nvizData['wire-color']['value']
-            for item in self.constants:
-                cmdMode += "fine,"
-                cmdFine += "%s," % item['constant']['resolution']
-                cmdCoarse += "%s," % item['constant']['resolution']
-                cmdShading += "gouraud,"
-                cmdStyle += "surface,"
-                cmdWire += "0:0:0,"
-            mode = []
-            for subcmd in (cmdMode, cmdFine, cmdCoarse,
-                           cmdShading, cmdStyle, cmdWire):
-                if flag_a:
-                    mode.append(subcmd.split(',')[0] + ' ')
-                else:
-                    subcmd = subcmd.strip(', ') + ' '
-                    cmd += subcmd
+            flag_a = "-a " if len(set(sigs)) == 1 else ""
+            parts.append(flag_a)
+            constSigs = [('fine',
+                          c['constant']['resolution'],
+                          c['constant']['resolution'],
+                          'gouraud',
+                          'surface',
+                          '0:0:0') for c in constants]
+            subcmds = zip(('mode', 'resolution_fine', 'resolution_coarse',
+                           'shading', 'style', 'wire_color'),
+                          zip(*(sigs + constSigs)))
             if flag_a:  # write only meaningful possibilities
-                cmd += mode[0]
+                mode = ["%s=%s " % (key, values[0])
+                        for key, values in subcmds]
+                parts.append(mode[0])
                 if 'fine' in mode[0]:
-                    cmd += mode[1]
+                    parts.append(mode[1])
                 elif 'coarse' in mode[0]:
-                    cmd += mode[2]
+                    parts.append(mode[2])
                 elif 'both' in mode[0]:
-                    cmd += mode[2]
-                    cmd += mode[1]
+                    parts.append(mode[2])
+                    parts.append(mode[1])
                 if 'flat' in mode[3]:
-                    cmd += mode[3]
+                    parts.append(mode[3])
                 if 'wire' in mode[4]:
-                    cmd += mode[4]
+                    parts.append(mode[4])
                 if 'coarse' in mode[0] or 'both' in mode[
                         0] and 'wire' in mode[3]:
-                    cmd += mode[5]
+                    parts.append(mode[5])
+            else:
+                for key, values in subcmds:
+                    parts.append("%s=%s " % (
+                        key, ','.join("%s" % value for value in values)))
             #
             # attributes
             #
-            cmdColorMap = "color_map="
-            cmdColorVal = "color="
-            for item in rasters:
-                nvizData = self.tree.GetLayerInfo(
-                    item, key='nviz')['surface']['attribute']
+            colorMaps = []
+            colorValues = []
+            for info in rasters:
+                nvizData = info['nviz']['surface']['attribute']
                 if 'color' not in nvizData:
-                    cmdColorMap += "%s," % self.tree.GetLayerInfo(
-                        item, key='maplayer').GetName()
+                    colorMaps.append(info['maplayer'].GetName())
                 else:
                     if nvizData['color']['map']:
-                        cmdColorMap += "%s," % nvizData['color']['value']
+                        colorMaps.append("%s" % nvizData['color']['value'])
                     else:
-                        cmdColorVal += "%s," % nvizData['color']['value']
+                        colorValues.append("%s" % nvizData['color']['value'])
                         # TODO
                         # transparency, shine, mask
-            for item in self.constants:
-                cmdColorVal += "%s," % item['constant']['color']
-            if cmdColorMap.split("=")[1]:
-                cmd += cmdColorMap.strip(', ') + ' '
-            if cmdColorVal.split("=")[1]:
-                cmd += cmdColorVal.strip(', ') + ' '
-            cmd += "\\\n"
+            for item in constants:
+                colorValues.append("%s" % item['constant']['color'])
+            if colorMaps:
+                parts.append("color_map=%s " % ','.join(colorMaps))
+            if colorValues:
+                parts.append("color=%s " % ','.join(colorValues))
+            parts.append("\\\n")
         #
         # vlines
         #
         if vectors:
-            cmdLines = cmdLWidth = cmdLHeight = cmdLColor = cmdLMode = cmdLPos = \
-                cmdPoints = cmdPWidth = cmdPSize = cmdPColor = cmdPMarker = cmdPPos = cmdPLayer = ""
+            lines = []
+            points = []
             markers = ['x', 'box', 'sphere', 'cube', 'diamond',
                        'dec_tree', 'con_tree', 'aster', 'gyro', 'histogram']
-            for vector in vectors:
-                layerName = self.tree.GetLayerInfo(
-                    vector, key='maplayer').GetName()
+            for info in vectors:
+                layerName = info['maplayer'].GetName()
                 vInfo = grass.vector_info_topo(layerName)
-                nvizData = self.tree.GetLayerInfo(vector, key='nviz')['vector']
+                nvizData = info['nviz']['vector']
                 if (vInfo['lines'] + vInfo['boundaries']) > 0:
-                    cmdLines += "%s," % self.tree.GetLayerInfo(
-                        vector, key='maplayer').GetName()
-                    cmdLWidth += "%d," % nvizData['lines']['width']['value']
-                    cmdLHeight += "%d," % nvizData['lines']['height']['value']
-                    cmdLColor += "%s," % nvizData['lines']['color']['value']
-                    cmdLMode += "%s," % nvizData['lines']['mode']['type']
-                    cmdLPos += "0,0,%d," % nvizData['lines']['height']['value']
+                    vlines = nvizData['lines']
+                    lines.append((
+                        layerName,
+                        "%d" % vlines['width']['value'],
+                        "%s" % vlines['color']['value'],
+                        "%d" % vlines['height']['value'],
+                        "%s" % vlines['mode']['type'],
+                        "0,0,%d" % vlines['height']['value']))
                 if (vInfo['points'] + vInfo['centroids']) > 0:
-                    cmdPoints += "%s," % self.tree.GetLayerInfo(
-                        vector, key='maplayer').GetName()
-                    cmdPWidth += "%d," % nvizData['points']['width']['value']
-                    cmdPSize += "%d," % nvizData['points']['size']['value']
-                    cmdPColor += "%s," % nvizData['points']['color']['value']
-                    cmdPMarker += "%s," % markers[
-                        nvizData['points']['marker']['value']]
-                    cmdPPos += "0,0,%d," % nvizData[
-                        'points']['height']['value']
-                    cmdPLayer += "1,1,"
-            if cmdLines:
-                cmd += "vline=" + cmdLines.strip(',') + ' '
-                cmd += "vline_width=" + cmdLWidth.strip(',') + ' '
-                cmd += "vline_color=" + cmdLColor.strip(',') + ' '
-                cmd += "vline_height=" + cmdLHeight.strip(',') + ' '
-                cmd += "vline_mode=" + cmdLMode.strip(',') + ' '
-                cmd += "vline_position=" + cmdLPos.strip(',') + ' '
-            if cmdPoints:
-                cmd += "vpoint=" + cmdPoints.strip(',') + ' '
-                cmd += "vpoint_width=" + cmdPWidth.strip(',') + ' '
-                cmd += "vpoint_color=" + cmdPColor.strip(',') + ' '
-                cmd += "vpoint_size=" + cmdPSize.strip(',') + ' '
-                cmd += "vpoint_marker=" + cmdPMarker.strip(',') + ' '
-                cmd += "vpoint_position=" + cmdPPos.strip(',') + ' '
-                cmd += "vpoint_layer=" + cmdPLayer.strip(',') + ' '
-            cmd += "\\\n"
+                    vpoints = nvizData['points']
+                    points.append((
+                        layerName,
+                        "%d" % vpoints['width']['value'],
+                        "%s" % vpoints['color']['value'],
+                        "%d" % vpoints['size']['value'],
+                        markers[vpoints['marker']['value']],
+                        "0,0,%d" % vpoints['height']['value'],
+                        "1,1"))
+            if lines:
+                for key, values in zip(('vline', 'vline_width', 'vline_color',
+                                        'vline_height', 'vline_mode',
+                                        'vline_position'),
+                                       zip(*lines)):
+                    parts.append("%s=%s " % (key, ','.join(values)))
+            if points:
+                for key, values in zip(('vpoint', 'vpoint_width',
+                                        'vpoint_color', 'vpoint_size',
+                                        'vpoint_marker', 'vpoint_position',
+                                        'vpoint_layer'),
+                                       zip(*points)):
+                    parts.append("%s=%s " % (key, ','.join(values)))
+            parts.append("\\\n")
 
         #
         # volumes
         #
         if volumes:
-            cmdName = cmdShade = cmdRes = cmdPos = cmdIso = ""
-            cmdIsoColorMap = cmdIsoColorVal = cmdIsoTrMap = cmdIsoTrVal = ""
-            cmdSlice = cmdSliceTransp = cmdSlicePos = ""
-            for i, volume in enumerate(volumes):
-                nvizData = self.tree.GetLayerInfo(volume, key='nviz')['volume']
-                cmdName += "%s," % self.tree.GetLayerInfo(
-                    volume, key='maplayer').GetName()
-                cmdShade += "%s," % nvizData['draw'][
-                    'shading']['isosurface']['desc']
-                cmdRes += "%d," % nvizData['draw'][
-                    'resolution']['isosurface']['value']
+            names = []
+            shades = []
+            resolutions = []
+            positions = []
+            isoLevels = []
+            isoColorMaps = []
+            isoColorValues = []
+            isoTranspMaps = []
+            isoTranspValues = []
+            slices = []
+            slicePositions = []
+            sliceTransps = []
+            for i, info in enumerate(volumes):
+                nvizData = info['nviz']['volume']
+                names.append(info['maplayer'].GetName())
+                shades.append("%s" % nvizData['draw'][
+                    'shading']['isosurface']['desc'])
+                resolutions.append("%d" % nvizData['draw'][
+                    'resolution']['isosurface']['value'])
                 if nvizData['position']:
-                    cmdPos += "%d,%d,%d," % (
+                    positions.append("%d,%d,%d" % (
                         nvizData['position']['x'],
                         nvizData['position']['y'],
-                        nvizData['position']['z'])
+                        nvizData['position']['z']))
                 for iso in nvizData['isosurface']:
                     level = iso['topo']['value']
-                    cmdIso += "%d:%s," % (i + 1, level)
+                    isoLevels.append("%d:%s" % (i + 1, level))
                     if iso['color']['map']:
-                        cmdIsoColorMap += "%s," % iso['color']['value']
+                        isoColorMaps.append("%s" % iso['color']['value'])
                     else:
-                        cmdIsoColorVal += "%s," % iso['color']['value']
+                        isoColorValues.append("%s" % iso['color']['value'])
                     if 'transp' in iso:
                         if iso['transp']['map']:
-                            cmdIsoTrMap += "%s," % iso['transp']['value']
+                            isoTranspMaps.append("%s" % iso['transp']['value'])
                         else:
-                            cmdIsoTrVal += "%s," % iso['transp']['value']
+                            isoTranspValues.append(
+                                "%s" % iso['transp']['value'])
 
                 for slice in nvizData['slice']:
                     axis = ('x', 'y', 'z')[slice['position']['axis']]
-                    cmdSlice += "%d:%s," % (i + 1, axis)
+                    slices.append("%d:%s" % (i + 1, axis))
                     for coord in ('x1', 'x2', 'y1', 'y2', 'z1', 'z2'):
-                        cmdSlicePos += "%f," % slice['position'][coord]
-                    cmdSliceTransp += "%s," % slice['transp']['value']
+                        slicePositions.append("%f" % slice['position'][coord])
+                    sliceTransps.append("%s" % slice['transp']['value'])
 
-            cmd += "volume=" + cmdName.strip(',') + ' '
-            cmd += "volume_shading=" + cmdShade.strip(',') + ' '
-            cmd += "volume_resolution=" + cmdRes.strip(',') + ' '
+            parts.append("volume=%s " % ','.join(names))
+            parts.append("volume_shading=%s " % ','.join(shades))
+            parts.append("volume_resolution=%s " % ','.join(resolutions))
             if nvizData['position']:
-                cmd += "volume_position=" + cmdPos.strip(',') + ' '
-            if cmdIso:
-                cmd += "isosurf_level=" + cmdIso.strip(',') + ' '
-                if cmdIsoColorMap:
-                    cmd += "isosurf_color_map=" + \
-                        cmdIsoColorMap.strip(',') + ' '
-                if cmdIsoColorVal:
-                    cmd += "isosurf_color_value=" + \
-                        cmdIsoColorVal.strip(',') + ' '
-                if cmdIsoTrMap:
-                    cmd += "isosurf_transp_map=" + cmdIsoTrMap.strip(',') + ' '
-                if cmdIsoTrVal:
-                    cmd += "isosurf_transp_value=" + \
-                        cmdIsoTrVal.strip(',') + ' '
-            if cmdSlice:
-                cmd += "slice=" + cmdSlice.strip(',') + ' '
-                cmd += "slice_position=" + cmdSlicePos.strip(',') + ' '
-                cmd += "slice_transparency=" + cmdSliceTransp.strip(',') + ' '
+                parts.append("volume_position=%s " % ','.join(positions))
+            if isoLevels:
+                parts.append("isosurf_level=%s " % ','.join(isoLevels))
+                if isoColorMaps:
+                    parts.append("isosurf_color_map=%s " %
+                                 ','.join(isoColorMaps))
+                if isoColorValues:
+                    parts.append("isosurf_color_value=%s " %
+                                 ','.join(isoColorValues))
+                if isoTranspMaps:
+                    parts.append("isosurf_transp_map=%s " %
+                                 ','.join(isoTranspMaps))
+                if isoTranspValues:
+                    parts.append("isosurf_transp_value=%s " %
+                                 ','.join(isoTranspValues))
+            if slices:
+                parts.append("slice=%s " % ','.join(slices))
+                parts.append("slice_position=%s " % ','.join(slicePositions))
+                parts.append("slice_transparency=%s " %
+                             ','.join(sliceTransps))
 
         #
         # cutting planes
         #
-        cplane = self.lmgr.nviz.FindWindowById(
-            self.lmgr.nviz.win['cplane']['planes']).GetStringSelection()
+        toolWindows = self._getCmdToolWindows()
+        cplane = toolWindows['cplane'].GetStringSelection()
         try:
             planeIndex = int(cplane.split()[-1]) - 1
         except (IndexError, ValueError):
             planeIndex = None
         if planeIndex is not None:
             shading = ['clear', 'top', 'bottom', 'blend', 'shaded']
-            cmd += "cplane=%d " % planeIndex
-            cmd += "cplane_rotation=%d " % self.cplanes[
-                planeIndex]['rotation']['rot']
-            cmd += "cplane_tilt=%d " % self.cplanes[
-                planeIndex]['rotation']['tilt']
-            cmd += "cplane_position=%d,%d,%d " % (
-                self.cplanes[planeIndex]['position']['x'],
-                self.cplanes[planeIndex]['position']['y'],
-                self.cplanes[planeIndex]['position']['z'])
-            cmd += "cplane_shading=%s " % shading[
-                self.cplanes[planeIndex]['shading']]
-            cmd += "\\\n"
+            plane = self.cplanes[planeIndex]
+            parts.append("cplane=%d cplane_rotation=%d cplane_tilt=%d "
+                         "cplane_position=%d,%d,%d cplane_shading=%s \\\n" % (
+                             planeIndex,
+                             plane['rotation']['rot'],
+                             plane['rotation']['tilt'],
+                             plane['position']['x'],
+                             plane['position']['y'],
+                             plane['position']['z'],
+                             shading[plane['shading']]))
         #
         # viewpoint
         #
-        subcmd = "position=%.2f,%.2f " % (
-            self.view['position']['x'],
-            self.view['position']['y'])
-        subcmd += "height=%d " % (self.iview['height']['value'])
-        subcmd += "perspective=%d " % (self.view['persp']['value'])
-        subcmd += "twist=%d " % (self.view['twist']['value'])
-        subcmd += "zexag=%f " % (self.view['z-exag']
-                                 ['value'] / self.iview['z-exag']['llRatio'])
-        subcmd += "focus=%d,%d,%d " % (
-            self.iview['focus']['x'],
-            self.iview['focus']['y'],
-            self.iview['focus']['z'])
-        cmd += subcmd
+        parts.append("position=%.2f,%.2f height=%d perspective=%d twist=%d "
+                     "zexag=%f focus=%d,%d,%d " % (
+                         self.view['position']['x'],
+                         self.view['position']['y'],
+                         self.iview['height']['value'],
+                         self.view['persp']['value'],
+                         self.view['twist']['value'],
+                         self.view['z-exag']['value'] /
+                         self.iview['z-exag']['llRatio'],
+                         self.iview['focus']['x'],
+                         self.iview['focus']['y'],
+                         self.iview['focus']['z']))
 
         # background
-        subcmd = "bgcolor=%d:%d:%d " % (self.view['background']['color'][:3])
         if self.view['background']['color'] != (255, 255, 255):
-            cmd += subcmd
-        cmd += "\\\n"
+            parts.append("bgcolor=%d:%d:%d " %
+                         tuple(self.view['background']['color'][:3]))
+        parts.append("\\\n")
         # light
-        subcmd = "light_position=%.2f,%.2f,%.2f " % (
-            self.light['position']['x'],
-            self.light['position']['y'],
-            self.light['position']['z'] / 100.)
-        subcmd += "light_brightness=%d " % (self.light['bright'])
-        subcmd += "light_ambient=%d " % (self.light['ambient'])
-        subcmd += "light_color=%d:%d:%d " % (self.light['color'][:3])
-        cmd += subcmd
-        cmd += "\\\n"
+        parts.append("light_position=%.2f,%.2f,%.2f light_brightness=%d "
+                     "light_ambient=%d light_color=%d:%d:%d \\\n" % ((
+                         self.light['position']['x'],
+                         self.light['position']['y'],
+                         self.light['position']['z'] / 100.,
+                         self.light['bright'],
+                         self.light['ambient']) +
+                         tuple(self.light['color'][:3])))
         # fringe
-        toolWindow = self.lmgr.nviz
-        direction = ''
-        for dir in ('nw', 'ne', 'sw', 'se'):
-            if toolWindow.FindWindowById(
-                    toolWindow.win['fringe'][dir]).IsChecked():
-                direction += "%s," % dir
+        direction = ','.join(dir for dir in FRINGE_DIRECTIONS
+                             if toolWindows[dir].IsChecked())
         if direction:
-            subcmd = "fringe=%s " % (direction.strip(','))
-            color = toolWindow.FindWindowById(
-                toolWindow.win['fringe']['color']).GetValue()
-            subcmd += "fringe_color=%d:%d:%d " % (color[0], color[1], color[2])
-            subcmd += "fringe_elevation=%d " % (toolWindow.FindWindowById(
-                toolWindow.win['fringe']['elev']).GetValue())
-            cmd += subcmd
-            cmd += "\\\n"
+            color = toolWindows['color'].GetValue()
+            parts.append("fringe=%s fringe_color=%d:%d:%d "
+                         "fringe_elevation=%d \\\n" % (
+                             direction,
+                             color[0], color[1], color[2],
+                             toolWindows['elev'].GetValue()))
         # north arrow
-        if self.decoration['arrow']['show']:
-            subcmd = "arrow_position=%d,%d " % (
-                self.decoration['arrow']['position']['x'],
-                self.decoration['arrow']['position']['y'])
-            subcmd += "arrow_color=%s " % self.decoration['arrow']['color']
-            subcmd += "arrow_size=%d " % self.decoration['arrow']['size']
-            cmd += subcmd
+        arrow = self.decoration['arrow']
+        if arrow['show']:
+            parts.append("arrow_position=%d,%d arrow_color=%s "
+                         "arrow_size=%d " % (
+                             arrow['position']['x'],
+                             arrow['position']['y'],
+                             arrow['color'],
+                             arrow['size']))
 
         # output
         width, height = self.GetClientSize()
-        subcmd = 'output=nviz_output '
-        subcmd += 'format=ppm '
-        subcmd += 'size=%d,%d ' % (width, height)
-        cmd += subcmd
+        parts.append('output=nviz_output format=ppm size=%d,%d ' %
+                     (width, height))
 
-        return cmd
+        return ''.join(parts)
 
     def OnNvizCmd(self):
         """Generate and write command to command output"""
@@ -2638,26 +2858,16 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
             notification=Notification.RAISE_WINDOW)
 
     def SaveToFile(self, FileName, FileType, width, height):
-        """This draws the DC to a buffer that can be saved to a file.
-
-        .. todo::
-            fix BufferedPaintDC
+        """This draws the scene and saves it to a file.
 
         :param filename: file name
         :param FileType: type of bitmap
         :param width: image width
         :param height: image height
         """
+        self._flushPending()
         self._display.SaveToFile(FileName, width, height, FileType)
 
-        # pbuffer = wx.EmptyBitmap(max(1, self.Map.width), max(1, self.Map.height))
-        # dc = wx.BufferedPaintDC(self, pbuffer)
-        # dc.Clear()
-        # self.SetCurrent()
-        # self._display.Draw(False, -1)
-        # pbuffer.SaveFile(FileName, FileType)
-        # self.SwapBuffers()
-
     def GetDisplay(self):
         """Get display instance"""
         return self._display
@@ -2671,8 +2881,12 @@ class GLWindow(MapWindowBase, glcanvas.GLCanvas):
 
     def DisactivateWin(self):
         """Use when the class instance is hidden in MapFrame."""
-        pass
+        self.Map.layerAdded.disconnect(self._invalidateEnabledLayers)
+        self.Map.layerRemoved.disconnect(self._invalidateEnabledLayers)
 
     def ActivateWin(self):
         """Used when the class instance is activated in MapFrame."""
-        pass
+        # layer tree could be changed in the meantime
+        self._invalidateEnabledLayers()
+        self.Map.layerAdded.connect(self._invalidateEnabledLayers)
+        self.Map.layerRemoved.connect(self._invalidateEnabledLayers)
@@ -209,6 +209,29 @@ class Nviz(object):
             persp,
             twist)
 
+    def SetViewState(self, x, y, height, persp, twist, z_exag=None,
+                     viewdir=None, focus=None):
+        """Change view settings at once
+
+        :param x,y: position
+        :param height:
+        :param persp: perpective
+        :param twist:
+        :param z_exag: z-exag value or None to keep current value
+        :param viewdir: view direction (x, y, z) or None
+        :param focus: focus (x, y, z) or None, ignored when viewdir
+                      is given
+        """
+        if z_exag is not None:
+            self.SetZExag(z_exag)
+
+        self.SetView(x, y, height, persp, twist)
+
+        if viewdir is not None:
+            self.SetViewdir(*viewdir)
+        elif focus is not None:
+            self.SetFocus(*focus)
+
     def GetViewpointPosition(self):
         x = c_double()
         y = c_double()
@@ -295,6 +318,26 @@ class Nviz(object):
         else:
             Nviz_draw_all(self.data)
 
+    def DrawFull(self, swapBuffers, arrow=False, scalebar=False):
+        """Draw canvas in full quality including fringe and decorations
+
+        Fringe is drawn after buffers are swapped, otherwise it doesn't
+        have to be visible on some computers.
+
+        :param swapBuffers: function swapping GL buffers of the canvas
+        :param arrow: True to draw north arrow
+        :param scalebar: True to draw scale bars
+        """
+        self.Draw(False, -1)
+
+        swapBuffers()
+
+        self.DrawFringe()
+        if arrow:
+            self.DrawArrow()
+        if scalebar:
+            self.DrawScalebar()
+
     def EraseMap(self):
         """Erase map display (with background color)
         """
@@ -756,19 +799,7 @@ class Nviz(object):
         :return: -1 surface not found
         :return: -2 setting attributes failed
         """
-        Debug.msg(3, "Nviz::SetSurfaceRes(): id=%d, fine=%d, coarse=%d",
-                  id, fine, coarse)
-
-        if id > 0:
-            if not GS_surf_exists(id):
-                return -1
-
-            if GS_set_drawres(id, fine, fine, coarse, coarse) < 0:
-                return -2
-        else:
-            GS_setall_drawres(fine, fine, coarse, coarse)
-
-        return 1
+        return self.SetSurfaceDrawState(id, res=(fine, coarse))
 
     def SetSurfaceStyle(self, id, style):
         """Set draw style
@@ -791,22 +822,7 @@ class Nviz(object):
         :return: -1 surface not found
         :return: -2 setting attributes failed
         """
-        Debug.msg(3, "Nviz::SetSurfaceStyle(): id=%d, style=%d",
-                  id, style)
-
-        if id > 0:
-            if not GS_surf_exists(id):
-                return -1
-
-            if GS_set_drawmode(id, style) < 0:
-                return -2
-
-            return 1
-
-        if GS_setall_drawmode(style) < 0:
-            return -2
-
-        return 1
+        return self.SetSurfaceDrawState(id, style=style)
 
     def SetWireColor(self, id, color_str):
         """Set color of wire
@@ -823,27 +839,61 @@ class Nviz(object):
         :return: 1 on success
         :return: 0 on failure
         """
-        Debug.msg(3, "Nviz::SetWireColor(): id=%d, color=%s",
-                  id, color_str)
+        return self.SetSurfaceDrawState(id, color_str=color_str)
 
-        color = Nviz_color_from_str(color_str)
+    def SetSurfaceDrawState(self, id, res=None, style=None, color_str=None):
+        """Set draw resolution, draw style and wire color at once
+
+        Only given (not None) properties are changed. Existence of the
+        surface is checked only once. SetSurfaceRes(), SetSurfaceStyle()
+        and SetWireColor() set single property.
 
+        :param id: surface id (<= 0 for all)
+        :param res: tuple of x/y fine and coarse resolution
+        :param style: draw style (see SetSurfaceStyle())
+        :param color_str: wire color string (R:G:B)
+
+        :return: 1 on success
+        :return: -1 surface not found
+        :return: -2 setting attributes failed
+        """
+        Debug.msg(3, "Nviz::SetSurfaceDrawState(): id=%d, res=%s, style=%s, color=%s",
+                  id, res, style, color_str)
+
+        ret = 1
         if id > 0:
             if not GS_surf_exists(id):
                 return -1
 
-            GS_set_wire_color(id, color)
-        else:
+            if res is not None:
+                fine, coarse = res
+                if GS_set_drawres(id, fine, fine, coarse, coarse) < 0:
+                    ret = -2
+            if style is not None:
+                if GS_set_drawmode(id, style) < 0:
+                    ret = -2
+            if color_str is not None:
+                GS_set_wire_color(id, Nviz_color_from_str(color_str))
+
+            return ret
+
+        if res is not None:
+            fine, coarse = res
+            GS_setall_drawres(fine, fine, coarse, coarse)
+        if style is not None:
+            if GS_setall_drawmode(style) < 0:
+                ret = -2
+        if color_str is not None:
+            color = Nviz_color_from_str(color_str)
             nsurfs = c_int()
             surf_list = GS_get_surf_list(byref(nsurfs))
             for i in range(nsurfs.value):
-                id = surf_list[i]
-                GS_set_wire_color(id, color)
+                GS_set_wire_color(surf_list[i], color)
 
             G_free(surf_list)
             surf_list = None
 
-        return 1
+        return ret
 
     def GetSurfacePosition(self, id):
         """Get surface position